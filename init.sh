@@ -92,8 +92,7 @@ install_requirements() {
         "xlrd>=2.0.1"
         "colorama>=0.4.6"
         "tqdm>=4.65.0"
-        "fuzzywuzzy>=0.18.0"
-        "python-Levenshtein>=0.21.0"
+        "rapidfuzz>=3.0.0"
         "PyYAML>=6.0.1"
     )
     
@@ -1,20 +1,41 @@
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import json
 import hashlib
 from colorama import Fore, Style
+from openpyxl import Workbook
 
 logger = logging.getLogger(__name__)
 
+# Users target fields, in output column order
+_USER_TARGET_FIELDS = ('user_id', 'username', 'email', 'first_name', 'last_name',
+                       'full_name', 'is_active', 'created_at', 'updated_at', 'last_login_at')
+
+# Candidate input columns, in priority order, for User Groups relationships
+USER_IDENTIFIER_COLUMNS = ('user_id', 'username', 'email', 'User ID', 'Username', 'Email')
+GROUP_NAME_COLUMNS = ('group_name', 'group', 'Group', 'Group Name')
+
+# Rows converted and appended per batch when streaming a sheet to disk
+STREAM_CHUNK_ROWS = 10000
+
+# Below this many rows a plain list comprehension beats the .str accessor
+SMALL_COLUMN_ROWS = 50000
+
+# Rows scanned when collecting a few distinct sample values for display
+SAMPLE_SCAN_ROWS = 256
+
 class DataTransformer:
     def __init__(self, schema_file: str):
         self.schema_file = schema_file
         self.logger = logging.getLogger(__name__)
         self.group_id_map = {}  # Initialize the group_id_map
+        self._group_id_map_series = pd.Series(dtype=object)  # Vectorized view of group_id_map
         self.transformed_data = {}  # Initialize transformed_data as empty dict
         self.role_id_map = {}  # Initialize the role_id_map
+        self._role_id_by_lower = {}  # role_id_map keyed by lowercased role name
         
         with open(schema_file) as f:
             self.schema = json.load(f)
@@ -82,39 +103,40 @@ class DataTransformer:
             transformed_data = {}
             
             if tab_name == 'Users':
-                required_cols = ['user_id', 'username', 'email', 'first_name', 'last_name', 
-                               'full_name', 'is_active', 'created_at', 'updated_at', 'last_login_at']
+                # Field-level progress is collected and logged once per tab
+                msgs = []
                 
                 # Copy mapped fields
                 for source_field, target_field in mappings.items():
                     if source_field in df.columns:
                         transformed_data[target_field] = df[source_field]
-                        print(f"  ▶ MAPPING: {source_field} → {target_field}")
+                        msgs.append(f"  ▶ MAPPING: {source_field} → {target_field}")
 
                 # Handle derived fields
-                print(f"\n{Fore.CYAN}► DERIVING ADDITIONAL FIELDS{Style.RESET_ALL}")
-                
                 if 'email' in transformed_data:
                     if 'user_id' not in transformed_data:
                         transformed_data['user_id'] = transformed_data['email']
-                        print("  ▶ DERIVED: user_id from email")
+                        msgs.append("  ▶ DERIVED: user_id from email")
                     
                     if 'username' not in transformed_data:
-                        transformed_data['username'] = transformed_data['email'].apply(lambda x: x.split('@')[0])
-                        print("  ▶ DERIVED: username from email")
+                        transformed_data['username'] = self._derive_username(transformed_data['email'])
+                        msgs.append("  ▶ DERIVED: username from email")
                 
                 if 'full_name' in transformed_data:
                     if 'first_name' not in transformed_data or 'last_name' not in transformed_data:
                         names_df = transformed_data['full_name'].str.split(' ', n=1, expand=True)
                         transformed_data['first_name'] = names_df[0]
                         transformed_data['last_name'] = names_df[1]
-                        print("  ▶ DERIVED: first_name and last_name from full_name")
+                        msgs.append("  ▶ DERIVED: first_name and last_name from full_name")
 
                 # Initialize missing columns
-                for col in required_cols:
+                for col in _USER_TARGET_FIELDS:
                     if col not in transformed_data:
                         transformed_data[col] = None
-                        print(f"  ▶ INITIALIZED: {col}")
+                        msgs.append(f"  ▶ INITIALIZED: {col}")
+
+                if msgs and logger.isEnabledFor(logging.INFO):
+                    logger.info(f"Field alignment for {tab_name}:\n" + "\n".join(msgs))
 
                 result_df = pd.DataFrame(transformed_data)
                 print(f"\n{Fore.GREEN}► TRANSFORMATION COMPLETE: {len(result_df)} records processed{Style.RESET_ALL}")
@@ -149,67 +171,62 @@ class DataTransformer:
             # Create a copy to avoid modifying the original
             result_df = df.copy()
             
-            print("  • Processing name fields...")
             # Handle name fields - split full_name into first_name and last_name
             if 'full_name' in result_df.columns:
                 name_parts = result_df['full_name'].str.split(n=1, expand=True)
                 result_df['first_name'] = name_parts[0]
                 result_df['last_name'] = name_parts[1].fillna('')
             
-            print("  • Processing email fields...")
             # Handle email-based fields
             if 'email' in result_df.columns:
                 if 'user_id' not in result_df.columns:
                     result_df['user_id'] = result_df['email']
                 if 'username' not in result_df.columns:
-                    result_df['username'] = result_df['email'].apply(lambda x: str(x).split('@')[0] if pd.notna(x) else None)
+                    result_df['username'] = self._derive_username(result_df['email'])
             
-            print("  • Processing datetime fields...")
             # Convert datetime fields to ISO format
             datetime_fields = ['created_at', 'updated_at', 'last_login_at']
             for field in datetime_fields:
                 if field in result_df.columns and result_df[field].notna().any():
                     result_df[field] = pd.to_datetime(result_df[field]).dt.strftime('%Y-%m-%dT%H:%M:%S.000Z')
             
-            print("  • Standardizing is_active field...")
             # Standardize is_active values
             if 'is_active' in result_df.columns:
-                result_df['is_active'] = result_df['is_active'].map({
+                # Stored as a Yes/No categorical so validation compares int8 codes
+                result_df['is_active'] = pd.Categorical(result_df['is_active'].map({
                     'Active': 'Yes',
                     'Deactivated': 'No',
                     'Invited': 'No'
-                }).fillna('No')
-            
-            # Define the required column order
-            required_columns = [
-                'user_id',
-                'username',
-                'email',
-                'first_name',
-                'last_name',
-                'full_name',
-                'is_active',
-                'created_at',
-                'updated_at',
-                'last_login_at'
-            ]
+                }).fillna('No'), categories=['Yes', 'No'])
             
-            print("  • Ensuring all required columns exist...")
             # Ensure all required columns exist
-            for col in required_columns:
+            for col in _USER_TARGET_FIELDS:
                 if col not in result_df.columns:
                     result_df[col] = None
             
             # Reorder columns
-            result_df = result_df[required_columns]
+            result_df = result_df[list(_USER_TARGET_FIELDS)]
             
-            print("  • User transformation complete")
+            logger.info(f"User transformation complete: {len(result_df)} records")
             return result_df
         
         except Exception as e:
             print(f"  • ERROR in _transform_users: {str(e)}")
             raise
 
+    def _derive_username(self, emails: pd.Series) -> pd.Series:
+        """Derive usernames from the local part of email addresses."""
+        if len(emails) < SMALL_COLUMN_ROWS:
+            present = emails.notna().to_numpy()
+            usernames = [
+                str(email).split('@', 1)[0] if is_present else None
+                for email, is_present in zip(emails.to_numpy(), present)
+            ]
+            return pd.Series(usernames, index=emails.index, dtype=object)
+        
+        usernames = emails.astype(str).str.partition('@')[0]
+        return usernames.astype(object).where(emails.notna(), None)
+
     def _transform_groups(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transform Groups tab data according to schema rules."""
         COLUMN_ORDER = ['group_id', 'group_name', 'group_description']
@@ -224,27 +241,23 @@ class DataTransformer:
                                else df.get('Description', None)
         })
         
-        # Remove any rows where group_name is empty or NaN
-        clean_df = clean_df.dropna(subset=['group_name'])
-        clean_df = clean_df[clean_df['group_name'].str.strip() != '']
-        
-        # Remove any duplicates
-        clean_df = clean_df.drop_duplicates(subset=['group_name'])
+        # Drop empty or NaN group names and duplicates in a single masked pass
+        names = clean_df['group_name'].astype('string').str.strip()
+        mask = names.notna() & (names.str.len() > 0)
+        clean_df = clean_df.loc[mask].assign(group_name=names[mask]).drop_duplicates(
+            subset=['group_name'], ignore_index=True
+        )
         
         # Generate sequential group_ids
-        clean_df['group_id'] = range(1, len(clean_df) + 1)
-        
-        # Reset and create the group_id_map
-        self.group_id_map.clear()  # Clear existing mappings
+        clean_df['group_id'] = np.arange(1, len(clean_df) + 1)
         
-        # Store mapping for relationship resolution
-        for _, row in clean_df.iterrows():
-            group_name = str(row['group_name']).strip()
-            if group_name:
-                self.group_id_map[group_name] = row['group_id']
+        # Reset and store mapping for relationship resolution
+        self.group_id_map = dict(zip(clean_df['group_name'], clean_df['group_id']))
+        self._group_id_map_series = pd.Series(self.group_id_map)
         
         logger.info(f"Created {len(self.group_id_map)} group ID mappings")
-        logger.debug(f"First 5 group mappings: {dict(list(self.group_id_map.items())[:5])}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"First 5 group mappings: {dict(list(self.group_id_map.items())[:5])}")
         
         # Fill missing descriptions without using inplace
         clean_df = clean_df.assign(
@@ -274,9 +287,11 @@ class DataTransformer:
         # Update role_id_map
         self.role_id_map = {row['role_name']: row['role_id'] 
                             for _, row in roles_df.iterrows()}
+        self._role_id_by_lower = {name.lower(): role_id for name, role_id in self.role_id_map.items()}
         
         logger.info(f"Created {len(self.role_id_map)} role ID mappings")
-        logger.debug(f"Role mappings: {dict(list(self.role_id_map.items()))}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Role mappings: {dict(list(self.role_id_map.items()))}")
         
         return roles_df[COLUMN_ORDER]
 
@@ -296,9 +311,14 @@ class DataTransformer:
         
         if tab_name == "User Groups" and 'group_id' in transformed_df.columns:
             # Map the group_id to the new incremental IDs
-            transformed_df['group_id'] = transformed_df['group_id'].apply(
-                lambda x: self.group_id_map.get(str(x), x) if pd.notna(x) else x
-            )
+            group_ids = transformed_df['group_id']
+            positions = self._group_id_map_series.index.get_indexer(group_ids.astype(str))
+            found = group_ids.notna().to_numpy() & (positions >= 0)
+            # Fill by position so the new IDs keep their integer type; unmatched
+            # values stay as they were
+            values = group_ids.to_numpy(dtype=object, copy=True)
+            values[found] = self._group_id_map_series.to_numpy()[positions[found]]
+            transformed_df['group_id'] = pd.Series(values, index=group_ids.index).infer_objects()
             
         return transformed_df
 
@@ -368,7 +388,8 @@ class DataTransformer:
     def _transform_user_groups(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transform User Groups relationships using username and group_name."""
         logger.info(f"Processing User Groups relationships from {len(df)} records")
-        logger.debug(f"Input columns: {df.columns.tolist()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Input columns: {df.columns.tolist()}")
         
         # Create mappings from Users table
         if 'Users' in self.transformed_data:
@@ -397,37 +418,31 @@ class DataTransformer:
             logger.error("Users table not found in transformed data")
             return pd.DataFrame(columns=['user_id', 'group_id'])
 
-        # Create the relationships
-        relationships = []
-        for _, row in df.iterrows():
-            # Try multiple possible column names for user identifier
-            user_identifier = None
-            for col in ['user_id', 'username', 'email', 'User ID', 'Username', 'Email']:
-                if col in row and pd.notna(row[col]):
-                    user_identifier = str(row[col]).strip()
-                    break
-                    
-            # Try multiple possible column names for group
-            group_name = None
-            for col in ['group_name', 'group', 'Group', 'Group Name']:
-                if col in row and pd.notna(row[col]):
-                    group_name = str(row[col]).strip()
-                    break
-
-            if user_identifier and group_name:
-                user_id = user_mappings.get(user_identifier, user_identifier)
-                group_id = self.group_id_map.get(group_name)
-                
-                if group_id:  # We always need a valid group_id
-                    relationships.append({
-                        'user_id': user_id,
-                        'group_id': group_id
-                    })
-                else:
-                    logger.warning(f"Could not find group_id for group_name: {group_name}")
+        # Resolve the candidate columns once, then work on whole columns
+        user_identifiers = self._coalesce_columns(df, USER_IDENTIFIER_COLUMNS)
+        group_names = self._coalesce_columns(df, GROUP_NAME_COLUMNS)
+        
+        relationships = pd.DataFrame(columns=['user_id', 'group_id'])
+        if user_identifiers is not None and group_names is not None:
+            has_both = (user_identifiers.fillna('') != '') & (group_names.fillna('') != '')
+            user_identifiers = user_identifiers[has_both]
+            group_names = group_names[has_both]
+            
+            user_ids = user_identifiers.map(user_mappings).fillna(user_identifiers)
+            group_ids = group_names.map(self._group_id_map_series)
+            
+            # We always need a valid group_id
+            found = group_ids.notna()
+            for group_name in group_names[~found].unique():
+                logger.warning(f"Could not find group_id for group_name: {group_name}")
+            
+            relationships = pd.DataFrame({
+                'user_id': user_ids[found],
+                'group_id': group_ids[found].astype(self._group_id_map_series.dtype)
+            }).reset_index(drop=True)
 
-        # Create final DataFrame and remove duplicates
-        result_df = pd.DataFrame(relationships)
+        # Remove duplicates
+        result_df = relationships
         if not result_df.empty:
             result_df = result_df.drop_duplicates()
             logger.info(f"Created {len(result_df)} unique user-group relationships")
@@ -437,6 +452,15 @@ class DataTransformer:
         
         return result_df
 
+    def _coalesce_columns(self, df: pd.DataFrame, candidates: Tuple[str, ...]) -> Optional[pd.Series]:
+        """Take the first non-null value across candidate columns, stripped."""
+        columns = [col for col in candidates if col in df.columns]
+        if not columns:
+            return None
+        
+        values = df[columns].bfill(axis=1).iloc[:, 0]
+        return values.astype(str).str.strip().where(values.notna())
+
     def organize_flattened_data(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
         """Process data into separate sheets according to schema rules."""
         organized_data = {}
@@ -471,7 +495,10 @@ class DataTransformer:
         # Process User Groups directly from the input sheet
         if 'User Groups' in data and self.group_id_map:
             user_groups_df = data['User Groups'].copy()
-            user_group_pairs = []
+            user_ids = []
+            group_ids = []
+            user_ids_append = user_ids.append
+            group_ids_append = group_ids.append
             
             # Log the input data for debugging
             logging.info(f"Processing User Groups sheet with columns: {user_groups_df.columns.tolist()}")
@@ -482,15 +509,16 @@ class DataTransformer:
                 group_name = str(row['Group']).strip()
                 
                 if group_name in self.group_id_map:
-                    user_group_pairs.append({
-                        'user_id': user_id,
-                        'group_id': self.group_id_map[group_name]
-                    })
+                    user_ids_append(user_id)
+                    group_ids_append(self.group_id_map[group_name])
                 else:
                     logging.warning(f"Group not found in mapping: {group_name}")
             
-            if user_group_pairs:
-                organized_data['User Groups'] = pd.DataFrame(user_group_pairs).drop_duplicates()
+            if user_ids:
+                organized_data['User Groups'] = pd.DataFrame({
+                    'user_id': user_ids,
+                    'group_id': group_ids
+                }).drop_duplicates()
                 logging.info(f"Created {len(organized_data['User Groups'])} user-group relationships")
             else:
                 logging.warning("No valid user-group relationships found")
@@ -499,7 +527,7 @@ class DataTransformer:
         # Log final state
         for name, df in organized_data.items():
             logging.info(f"{name} shape: {df.shape}, columns: {df.columns.tolist()}")
-            if not df.empty:
+            if not df.empty and logging.getLogger().isEnabledFor(logging.DEBUG):
                 logging.debug(f"{name} first few rows:\n{df.head()}")
 
         return organized_data
@@ -507,21 +535,19 @@ class DataTransformer:
     def save_transformed_data(self, data: Dict[str, pd.DataFrame], output_path: str) -> None:
         """Save transformed data to Excel file."""
         try:
-            with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                for tab_name, df in data.items():
-                    if df is not None and not df.empty:
-                        # Ensure all required columns are present
-                        if tab_name == 'Users':
-                            required_cols = ['user_id', 'username', 'email', 'first_name', 
-                                          'last_name', 'full_name', 'is_active', 
-                                          'created_at', 'updated_at', 'last_login_at']
-                            for col in required_cols:
-                                if col not in df.columns:
-                                    df[col] = None
-                            df = df[required_cols]  # Reorder columns
-                    
-                        df.to_excel(writer, sheet_name=tab_name, index=False)
-                        self.logger.info(f"Saved {len(df)} records to {tab_name} sheet")
+            # Write-only workbooks flush rows as they are appended instead of
+            # holding every cell of every sheet in memory until save
+            workbook = Workbook(write_only=True)
+            for tab_name, df in data.items():
+                if df is not None and not df.empty:
+                    # Ensure all required columns are present, in order, without
+                    # mutating the caller's DataFrame
+                    if tab_name == 'Users':
+                        df = df.reindex(columns=list(_USER_TARGET_FIELDS))
+
+                    self._stream_sheet(workbook, tab_name, df)
+                    self.logger.info(f"Saved {len(df)} records to {tab_name} sheet")
+            workbook.save(output_path)
         
             self.logger.info(f"Successfully saved transformed data to {output_path}")
             return True
@@ -529,6 +555,18 @@ class DataTransformer:
             self.logger.error(f"Error saving transformed data: {str(e)}")
             return False
 
+    def _stream_sheet(self, workbook: Workbook, tab_name: str, df: pd.DataFrame) -> None:
+        """Append a DataFrame to a write-only workbook one chunk of rows at a time."""
+        worksheet = workbook.create_sheet(title=tab_name)
+        worksheet.append([str(col) for col in df.columns])
+        
+        for start in range(0, len(df), STREAM_CHUNK_ROWS):
+            chunk = df.iloc[start:start + STREAM_CHUNK_ROWS]
+            # Excel has no NaN, so blank out missing values like to_excel does
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append(row)
+
     def _display_field_alignments(self, df: pd.DataFrame, tab_name: str, mappings: Dict):
         """Display current field alignments with sample values."""
         print(f"\n{Fore.CYAN}> CURRENT FIELD ALIGNMENTS FOR {tab_name}")
@@ -649,8 +687,7 @@ class DataTransformer:
         print(f"{Fore.CYAN}Available target fields:{Style.RESET_ALL}")
         
         if tab_name == "Users":
-            target_fields = ['user_id', 'username', 'email', 'first_name', 'last_name', 
-                            'full_name', 'is_active', 'created_at', 'updated_at', 'last_login_at']
+            target_fields = _USER_TARGET_FIELDS
         else:
             target_fields = columns
         
@@ -684,8 +721,8 @@ class DataTransformer:
         print("=" * 60)
 
         for idx, (column, target) in enumerate(mappings.items(), 1):
-            # Get sample values
-            samples = df[column].dropna().unique()[:3].tolist()
+            # Get sample values from a bounded prefix of the column
+            samples = pd.unique(df[column].iloc[:SAMPLE_SCAN_ROWS].dropna())[:3]
             samples_str = ", ".join(str(s) for s in samples)
             
             # Determine mapping color based on whether it's mapped
@@ -702,8 +739,7 @@ class DataTransformer:
         
         # Get available target fields
         if tab_name == 'Users':
-            target_fields = ['user_id', 'username', 'email', 'first_name', 'last_name',
-                            'full_name', 'is_active', 'created_at', 'updated_at', 'last_login_at']
+            target_fields = _USER_TARGET_FIELDS
         else:
             target_fields = list(df.columns)
         
@@ -726,43 +762,42 @@ class DataTransformer:
     def _extract_roles(self, df: pd.DataFrame) -> pd.DataFrame:
         """Extract roles from the dataset."""
         # Extract unique roles from is_active field if it contains role information
-        roles = []
         if 'is_active' in df.columns:
-            roles.extend(df['is_active'].unique())
+            roles = pd.Index(df['is_active'].dropna().unique())
+        else:
+            roles = pd.Index([], dtype=object)
         
         # Create roles DataFrame
         roles_df = pd.DataFrame({
             'role_id': roles,
             'role_name': roles,
-            'role_description': [f"Auto-generated role for {role}" for role in roles]
+            'role_description': "Auto-generated role for " + roles.astype(str)
         })
         
         return roles_df
 
     def _create_user_roles(self, users_df: pd.DataFrame) -> pd.DataFrame:
         """Create user-role relationships based on user status."""
-        user_roles = []
-        
-        for _, user in users_df.iterrows():
-            status = str(user.get('is_active', '')).strip()
-            user_id = user['user_id']
-            
-            # Map Yes/No to Active/Deactivated
-            if status.lower() == 'yes':
-                role_name = 'Active'
-            elif status.lower() == 'no':
-                role_name = 'Deactivated'
-            else:
-                # Handle other statuses (Invited, Declined) if present
-                role_name = status if status in self.role_id_map else 'Deactivated'
-            
-            role_id = self.role_id_map.get(role_name)
-            if role_id is not None:
-                user_roles.append({
-                    'user_id': user_id,
-                    'role_id': role_id
-                })
-            else:
-                logger.warning(f"No role_id found for status: {status}")
-        
-        return pd.DataFrame(user_roles)
+        # StringDtype keeps the strip/lower/replace chain in pandas' string kernels
+        # (Arrow-backed when pyarrow is installed) instead of per-object calls
+        if 'is_active' in users_df.columns:
+            status = users_df['is_active'].astype('string').str.strip()
+        else:
+            status = pd.Series('', index=users_df.index, dtype='string')
+        
+        # Map Yes/No to Active/Deactivated; other statuses (Invited, Declined)
+        # keep their own role if one exists, otherwise fall back to Deactivated
+        role_keys = status.str.lower().replace({'yes': 'active', 'no': 'deactivated'})
+        role_ids = role_keys.map(self._role_id_by_lower)
+        if 'deactivated' in self._role_id_by_lower:
+            role_ids = role_ids.fillna(self._role_id_by_lower['deactivated'])
+        
+        found = role_ids.notna()
+        if not found.all():
+            missing = role_keys[~found].unique().tolist()
+            logger.warning(f"No role_id found for {(~found).sum()} users with roles: {missing}")
+        
+        return pd.DataFrame({
+            'user_id': users_df.loc[found, 'user_id'].to_numpy(),
+            'role_id': role_ids[found].astype('int64').to_numpy()
+        })
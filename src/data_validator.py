@@ -1,15 +1,91 @@
 import pandas as pd
+import numpy as np
+from pandas.api.types import is_datetime64_any_dtype
 import logging
 from typing import Dict, Tuple, Any, List
 
-# Set logging level to DEBUG
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Datetime fields checked for ISO 8601 format
+DATETIME_FIELDS = ['created_at', 'updated_at', 'last_login_at']
+ISO_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Fixed layout of ISO_DATETIME_FORMAT strings: 20 characters, digits everywhere
+# except the separators below
+ISO_DATETIME_LENGTH = 20
+ISO_SEPARATORS = {4: '-', 7: '-', 10: 'T', 13: ':', 16: ':', 19: 'Z'}
+ISO_DIGIT_OFFSETS = [i for i in range(ISO_DATETIME_LENGTH) if i not in ISO_SEPARATORS]
+
+# Allowed is_active values, in category-code order
+IS_ACTIVE_VALUES = ['Yes', 'No']
+
+def _iso_datetime_mask(values: np.ndarray) -> np.ndarray:
+    """Return True for strings that are valid ISO_DATETIME_FORMAT timestamps.
+    
+    Scans the UTF-32 code points of a fixed-width copy of the values instead
+    of calling strptime per row: checks the fixed layout, then the field
+    ranges, including the number of days in each month.
+    """
+    # One spare character so longer strings are not truncated into a match
+    chars = np.asarray(values, dtype=f'U{ISO_DATETIME_LENGTH + 1}')
+    codes = chars.view(np.uint32).reshape(len(chars), ISO_DATETIME_LENGTH + 1)
+    
+    mask = np.ones(len(chars), dtype=bool)
+    for offset in ISO_DIGIT_OFFSETS:
+        column = codes[:, offset]
+        mask &= (column >= ord('0')) & (column <= ord('9'))
+    for offset, separator in ISO_SEPARATORS.items():
+        mask &= codes[:, offset] == ord(separator)
+    mask &= codes[:, ISO_DATETIME_LENGTH] == 0
+    if not mask.any():
+        return mask
+    
+    # Digit values as int16, filled column by column to avoid a wide temporary;
+    # rows whose characters were not digits are already masked out
+    digits = np.empty((len(chars), len(ISO_DIGIT_OFFSETS)), dtype=np.int16)
+    for i, offset in enumerate(ISO_DIGIT_OFFSETS):
+        digits[:, i] = codes[:, offset]
+    digits -= ord('0')
+    
+    # Digit columns: YYYY MM DD hh mm ss
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+    mask &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    mask &= (hour < 24) & (minute < 60) & (second < 60)
+    
+    # Days in month from consecutive month starts; invalid rows use January
+    months = (np.where(mask, year, 1970).astype(np.int64) - 1970) * 12 + np.where(mask, month, 1) - 1
+    month_start = months.astype('datetime64[M]')
+    month_days = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+    mask &= day <= month_days
+    return mask
+
+def split_records(df: pd.DataFrame, valid_mask: np.ndarray) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split a frame into its valid and invalid rows by a boolean row mask."""
+    valid_mask = np.asarray(valid_mask, dtype=bool)
+    valid_positions = np.flatnonzero(valid_mask)
+    if len(valid_positions) == len(df):
+        # No rows to drop: a shallow copy gives the caller its own frame
+        # object without copying the column data
+        return df.copy(deep=False), df.iloc[:0]
+    return df.take(valid_positions), df.take(np.flatnonzero(~valid_mask))
+
+
 class DataValidator:
-    def __init__(self, schema: Dict):
+    def __init__(self, schema: Dict, verbose: bool = True):
         self.schema = schema
         self.logger = logging.getLogger(__name__)
+        self._verbose = verbose  # Print per-reason detail
+        
+        # Mandatory columns per tab, resolved from the schema once
+        self._mandatory_cols = {
+            tab: tuple(field for field, spec in fields.items() if spec.get('mandatory'))
+            for tab, fields in schema.items()
+        }
 
     def validate_data(self, data: Dict[str, pd.DataFrame]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
         """Validate all data according to schema rules."""
@@ -17,195 +93,215 @@ class DataValidator:
         invalid_data = {}
 
         for tab_name, df in data.items():
-            print(f"\n{'='*50}")
-            print(f"Processing {tab_name}")
-            print(f"{'='*50}")
-            print(f"Total records: {len(df)}")
+            # The per-tab report is only built when it will actually be logged
+            report = self.logger.isEnabledFor(logging.INFO)
+            lines = [f"Validation of {tab_name}: {len(df)} records"] if report else None
             
             try:
                 if df.empty:
-                    print(f"\nTab {tab_name} is empty, skipping validation")
+                    if report:
+                        lines.append("- Tab is empty, skipping validation")
                     continue
 
                 valid_mask, reasons = self._validate_tab(df, tab_name)
                 
-                # Display validation results
-                if reasons:  # Only show if there are validation messages
-                    print("\nValidation Results:\n")
-                    for reason in reasons:
-                        print(f"- {reason}")
-                
-                valid_records = df[valid_mask]
-                invalid_records = df[~valid_mask]
-                
-                print(f"\nValidation Summary for {tab_name}:")
-                print(f"- Total records: {len(df)}")
-                print(f"- Valid records: {len(valid_records)}")
-                print(f"- Invalid records: {len(invalid_records)}")
-                
+                valid_records, invalid_records = split_records(df, valid_mask)
                 if len(valid_records) > 0:
                     valid_data[tab_name] = valid_records
                 if len(invalid_records) > 0:
                     invalid_data[tab_name] = invalid_records
+                
+                if report:
+                    lines.append(f"- Valid records: {len(valid_records)}")
+                    lines.append(f"- Invalid records: {len(invalid_records)}")
+                    if self._verbose:
+                        lines.extend(f"- {reason}" for reason in reasons)
 
             except Exception as e:
-                print(f"Error validating {tab_name}: {str(e)}")
+                self.logger.error(f"Error validating {tab_name}: {str(e)}")
                 raise
+            finally:
+                if report:
+                    self.logger.info("\n".join(lines))
 
         return valid_data, invalid_data
 
-    def _validate_users(self, df: pd.DataFrame) -> Dict:
-        """Validate users tab with detailed output."""
-        results = {}
-        
-        print("\n► ANALYZING FIELD STRUCTURE")
-        print("  ═════════════════════════")
-        print(f"  • DETECTED FIELDS: {', '.join(df.columns.tolist())}")
+    def _validate_tab(self, df: pd.DataFrame, tab_name: str) -> Tuple[np.ndarray, List[str]]:
+        """Validate a single tab and return its row mask with failure reasons."""
+        if tab_name == 'Users':
+            return self._validate_users_fused(df)
         
-        # Check for user_id column (case-insensitive)
-        user_id_cols = [col for col in df.columns if col.lower() == 'user_id']
-        email_cols = [col for col in df.columns if col.lower() == 'email']
-        
-        print("\n► IDENTIFIER ANALYSIS")
-        print("  ══════════════════")
-        print(f"  • USER ID FIELDS: {', '.join(user_id_cols)}")
-        print(f"  • EMAIL FIELDS: {', '.join(email_cols)}")
+        if tab_name == 'User Groups':
+            valid_mask, reasons = self._validate_user_groups(df)
+        elif tab_name in ['Groups', 'Roles', 'Resources']:
+            valid_mask, reasons = self._validate_entity_tab(df, tab_name)
+        else:
+            valid_mask, reasons = self._validate_relationship_tab(df, tab_name)
         
-        # Identifier validation
-        identifier_mask = pd.Series(False, index=df.index)
+        return np.asarray(valid_mask, dtype=bool), reasons
+
+    def _validate_users_fused(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
+        """Run every Users check and combine them into a single row mask."""
+        identifier_ok, identifier_reasons = self._validate_user_identifier(df)
+        name_ok, name_reasons = self._validate_user_name(df)
+        active_ok, active_reasons = self._validate_is_active(df)
+        dates_ok, date_reasons = self._validate_dates(df)
         
-        if user_id_cols:
-            identifier_mask |= df[user_id_cols[0]].notna()
-        if email_cols:
-            identifier_mask |= df[email_cols[0]].notna()
+        # Combine into one preallocated array in place instead of chained Series &=
+        valid_mask = np.array(identifier_ok, dtype=bool)
+        valid_mask &= name_ok
+        valid_mask &= active_ok
+        valid_mask &= dates_ok
         
-        missing_identifier_count = (~identifier_mask).sum()
-        results['identifier'] = (identifier_mask, [
-            f"MISSING IDENTIFIERS IN {missing_identifier_count} RECORDS"
-        ])
+        return valid_mask, identifier_reasons + name_reasons + active_reasons + date_reasons
 
-        return results
-
-    def _validate_user_identifier(self, df: pd.DataFrame) -> Tuple[pd.Series, list]:
+    def _validate_user_identifier(self, df: pd.DataFrame) -> Tuple[np.ndarray, list]:
         """Validate user identifier fields."""
         identifier_fields = ['user_id', 'username', 'email']
         available_fields = [field for field in identifier_fields if field in df.columns]
         
         if not available_fields:
-            return pd.Series(False, index=df.index), ["No identifier fields (user_id/username/email) found"]
+            return np.zeros(len(df), dtype=bool), ["No identifier fields (user_id/username/email) found"]
         
         # Check if at least one identifier field is present per record
-        has_identifier = pd.Series(False, index=df.index)
-        for field in available_fields:
-            has_identifier |= df[field].notna()
+        has_identifier = df[available_fields].notna().to_numpy().any(axis=1)
         
         reasons = []
         if not has_identifier.all():
-            count = (~has_identifier).sum()
+            count = len(has_identifier) - np.count_nonzero(has_identifier)
             reasons.append(f"Missing identifier (user_id/username/email) for {count} records")
         
         return has_identifier, reasons
 
-    def _validate_user_name(self, df: pd.DataFrame) -> Tuple[pd.Series, list]:
+    def _validate_user_name(self, df: pd.DataFrame) -> Tuple[np.ndarray, list]:
         """Validate user name fields."""
-        # Check if we have full_name
-        has_full_name = df['full_name'].notna()
-        
-        # Check if we have both first_name and last_name
-        has_first_last = df['first_name'].notna() & df['last_name'].notna()
+        reasons = []
+        # One notna pass over all three name columns; absent columns count as missing
+        present = df.reindex(columns=['full_name', 'first_name', 'last_name']).notna().to_numpy()
+        has_full_name = present[:, 0]
+        has_split = present[:, 1] & present[:, 2]
         
         # A record is valid if it has either full_name OR (first_name AND last_name)
-        valid_names = has_full_name | has_first_last
-        
-        reasons = []
-        if not valid_names.all():
-            count = (~valid_names).sum()
+        valid_names = has_full_name | has_split
+        count = len(valid_names) - np.count_nonzero(valid_names)
+        if count:
             reasons.append(f"Missing name fields (either full_name or first_name+last_name) for {count} records")
             
         # After transformation, all records should have all three fields populated
-        if df['full_name'].notna().any():  # If we have any full_name values
-            missing_split = ~(df['first_name'].notna() & df['last_name'].notna())
-            if missing_split.any():
-                count = missing_split.sum()
+        if has_full_name.any():  # If we have any full_name values
+            count = len(has_split) - np.count_nonzero(has_split)
+            if count:
                 reasons.append(f"Failed to split full_name into first_name and last_name for {count} records")
         
         return valid_names, reasons
 
-    def _validate_is_active(self, df: pd.DataFrame) -> Tuple[pd.Series, list]:
+    def _validate_is_active(self, df: pd.DataFrame) -> Tuple[np.ndarray, list]:
         """Validate is_active field."""
-        valid_mask = pd.Series(True, index=df.index)
         reasons = []
         
         if 'is_active' in df.columns:
+            column = df['is_active']
+            # Only 'Yes' or 'No' allowed; anything else (including null) gets code -1
+            if (isinstance(column.dtype, pd.CategoricalDtype)
+                    and list(column.cat.categories) == IS_ACTIVE_VALUES):
+                # Already coded against IS_ACTIVE_VALUES (as DataTransformer emits it)
+                codes = column.cat.codes.to_numpy()
+            else:
+                codes = pd.Categorical(column, categories=IS_ACTIVE_VALUES).codes
+            valid_mask = codes != -1
+            
             # Check for null values
-            null_mask = df['is_active'].isna()
-            if null_mask.any():
-                count = null_mask.sum()
+            null_mask = column.isna().to_numpy()
+            count = np.count_nonzero(null_mask)
+            if count:
                 reasons.append(f"Found {count} records with null is_active values")
-                valid_mask &= ~null_mask
             
-            # Check for valid values (only 'Yes' or 'No' allowed)
-            non_null_mask = ~null_mask
-            if non_null_mask.any():
-                valid_values = df.loc[non_null_mask, 'is_active'].isin(['Yes', 'No'])
-                if not valid_values.all():
-                    invalid_values = df.loc[non_null_mask & ~valid_values, 'is_active'].unique()
-                    reasons.append(f"Invalid is_active values found: {invalid_values.tolist()}")
-                    valid_mask &= ~(non_null_mask & ~valid_values)
+            # Check for valid values
+            invalid_mask = ~valid_mask & ~null_mask
+            if invalid_mask.any():
+                invalid_values = pd.unique(column.to_numpy()[invalid_mask])
+                reasons.append(f"Invalid is_active values found: {list(invalid_values)}")
         else:
             reasons.append("Missing required field: is_active")
-            valid_mask = pd.Series(False, index=df.index)
+            valid_mask = np.zeros(len(df), dtype=bool)
         
         return valid_mask, reasons
 
-    def _validate_dates(self, df: pd.DataFrame) -> Tuple[pd.Series, list]:
+    def _validate_dates(self, df: pd.DataFrame) -> Tuple[np.ndarray, list]:
         """Validate datetime fields."""
-        valid_mask = pd.Series(True, index=df.index)
+        valid_mask = np.ones(len(df), dtype=bool)
         reasons = []
-        datetime_fields = ['created_at', 'updated_at', 'last_login_at']
-        
-        for field in datetime_fields:
-            if field in df.columns:
-                non_null_dates = df[field].notna()
-                if non_null_dates.any():
-                    try:
-                        parsed_dates = pd.to_datetime(df.loc[non_null_dates, field], format='%Y-%m-%dT%H:%M:%SZ', errors='coerce')
-                        invalid_dates = parsed_dates.isna()
-                        if invalid_dates.any():
-                            mask = non_null_dates & invalid_dates
-                            valid_mask.loc[non_null_dates] &= ~invalid_dates
-                            sample_invalid = df.loc[mask, field].head()
-                            reasons.append(f"Invalid {field} format for {invalid_dates.sum()} records. Sample values: {sample_invalid.tolist()}")
-                    except Exception as e:
-                        reasons.append(f"Error parsing {field}: {str(e)}")
+        
+        # Columns that are already datetime64 need no format check
+        fields = [field for field in DATETIME_FIELDS
+                  if field in df.columns and not is_datetime64_any_dtype(df[field])]
+        if not fields:
+            return valid_mask, reasons
+        
+        # Check every datetime column in one pass over the stacked values
+        try:
+            stacked = pd.concat([df[field] for field in fields], ignore_index=True)
+            if pd.api.types.infer_dtype(stacked, skipna=True) == 'string':
+                # Plain strings go through the fixed-layout scanner; only what it
+                # rejects (usually few rows) is handed to the more lenient parser
+                parsed_ok = _iso_datetime_mask(stacked.to_numpy())
+                retry = ~parsed_ok & stacked.notna().to_numpy()
+                if retry.any():
+                    parsed_ok[retry] = pd.to_datetime(stacked[retry], format=ISO_DATETIME_FORMAT, errors='coerce',
+                                                      cache=True, utc=True).notna().to_numpy()
+            else:
+                parsed_ok = pd.to_datetime(stacked, format=ISO_DATETIME_FORMAT, errors='coerce',
+                                           cache=True, utc=True).notna().to_numpy()
+        except Exception as e:
+            reasons.append(f"Error parsing {', '.join(fields)}: {str(e)}")
+            return valid_mask, reasons
+        
+        row_count = len(df)
+        for position, field in enumerate(fields):
+            field_parsed = parsed_ok[position * row_count:(position + 1) * row_count]
+            # A value is valid if it parsed, or if it was missing to begin with
+            field_valid = field_parsed | df[field].isna().to_numpy()
+            if not field_valid.all():
+                valid_mask &= field_valid
+                # Only the first few invalid values are gathered for the sample
+                invalid_count = len(field_valid) - np.count_nonzero(field_valid)
+                sample_positions = np.flatnonzero(~field_valid)[:5]
+                sample_values = df[field].to_numpy()[sample_positions].tolist()
+                reasons.append(f"Invalid {field} format for {invalid_count} records. Sample values: {sample_values}")
         
         return valid_mask, reasons
 
-    def _validate_entity_tab(self, df: pd.DataFrame, tab_name: str) -> Tuple[pd.Series, list]:
+    def _validate_entity_tab(self, df: pd.DataFrame, tab_name: str) -> Tuple[np.ndarray, list]:
         """Validate entity tab data."""
-        # Initialize mask with DataFrame index
-        valid_mask = pd.Series(True, index=df.index)
-        reasons = []
+        mandatory_cols = self._mandatory_cols.get(tab_name, ())
+        if not mandatory_cols:
+            return np.ones(len(df), dtype=bool), []
+        
+        # Absent mandatory columns count as missing in every record
+        present = df.reindex(columns=list(mandatory_cols)).notna().to_numpy()
+        valid_mask = present.all(axis=1)
         
-        # Perform validations and update mask
-        # ... your validation logic here ...
+        missing_counts = len(df) - present.sum(axis=0)
+        reasons = [f"Missing mandatory field {col} for {count} records"
+                   for col, count in zip(mandatory_cols, missing_counts) if count]
         
         return valid_mask, reasons
 
-    def _validate_relationship_tab(self, df: pd.DataFrame, tab_name: str) -> Tuple[pd.Series, list]:
+    def _validate_relationship_tab(self, df: pd.DataFrame, tab_name: str) -> Tuple[np.ndarray, list]:
         """Validate relationship tab data."""
-        # Initialize mask with DataFrame index
-        valid_mask = pd.Series(True, index=df.index)
-        reasons = []
+        # Every column of a relationship row is a key, so all must be present
+        present = df.notna().to_numpy()
+        valid_mask = present.all(axis=1)
         
-        # Perform validations and update mask
-        # ... your validation logic here ...
+        missing_counts = len(df) - present.sum(axis=0)
+        reasons = [f"Missing values in {col} for {count} records"
+                   for col, count in zip(df.columns, missing_counts) if count]
         
         return valid_mask, reasons
 
-    def _validate_user_groups(self, df: pd.DataFrame) -> Tuple[pd.Series, List[str]]:
+    def _validate_user_groups(self, df: pd.DataFrame) -> Tuple[np.ndarray, List[str]]:
         """Validate User Groups relationship data."""
-        valid_mask = pd.Series(True, index=df.index)
+        valid_mask = np.ones(len(df), dtype=bool)
         reasons = []
 
         # Check required fields
@@ -213,23 +309,23 @@ class DataValidator:
         missing_fields = [field for field in required_fields if field not in df.columns]
         
         if missing_fields:
-            valid_mask = pd.Series(False, index=df.index)
+            valid_mask = np.zeros(len(df), dtype=bool)
             reasons.append(f"Missing required fields: {', '.join(missing_fields)}")
             return valid_mask, reasons
 
         # Check for null values
         for field in required_fields:
-            null_mask = df[field].isna()
-            if null_mask.any():
+            null_mask = df[field].isna().to_numpy()
+            count = np.count_nonzero(null_mask)
+            if count:
                 valid_mask &= ~null_mask
-                count = null_mask.sum()
                 reasons.append(f"Found {count} records with null {field}")
 
         # Check for duplicate relationships
-        duplicates = df.duplicated(subset=['user_id', 'group_id'], keep='first')
-        if duplicates.any():
+        duplicates = df.duplicated(subset=['user_id', 'group_id'], keep='first').to_numpy()
+        count = np.count_nonzero(duplicates)
+        if count:
             valid_mask &= ~duplicates
-            count = duplicates.sum()
             reasons.append(f"Found {count} duplicate user-group relationships")
 
         return valid_mask, reasons
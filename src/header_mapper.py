@@ -1,11 +1,14 @@
+import contextlib
+import io
 import json
 import os
+import sys
 from pathlib import Path
 import logging
-from fuzzywuzzy import process
-from typing import List, Dict, Tuple, Set
+from rapidfuzz import process, fuzz, utils
+from typing import List, Dict, Tuple, Set, Optional
 import pandas as pd
-from difflib import SequenceMatcher
+import numpy as np
 import yaml
 from colorama import Fore, Style, init
 
@@ -16,6 +19,13 @@ def clear_screen():
     """Clear the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
 
+@contextlib.contextmanager
+def buffered_output():
+    """Collect a multi-line listing and write it to stdout in one call."""
+    out = io.StringIO()
+    yield out
+    sys.stdout.write(out.getvalue())
+
 def print_header(text: str):
     """Print a formatted header."""
     print(f"\n{Fore.CYAN}{text}{Style.RESET_ALL}")
@@ -28,6 +38,44 @@ def print_mapping(target: str, source: str, is_unmapped: bool = False):
 
 logger = logging.getLogger(__name__)
 
+# libyaml's C loader when PyYAML was built with it, the pure-Python one otherwise
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Journal lines replayed on load before the history snapshot is rewritten
+MAPPINGS_JOURNAL_MAX_LINES = 500
+
+# Prominent fields per tab
+PROMINENT_FIELDS = {
+    "Users": ["user_id", "username", "email", "first_name", "last_name"],
+    "Groups": ["group_id", "group_name"],
+    "Roles": ["role_id", "role_name"],
+    "Resources": ["resource_id", "resource_name"],
+    "User Groups": ["user_id", "group_id"],
+    "User Roles": ["user_id", "role_id"],
+    "Group Roles": ["group_id", "role_id"],
+    "User Resources": ["user_id", "resource_id"],
+    "Role Resources": ["role_id", "resource_id"],
+    "Group Resources": ["group_id", "resource_id"],
+    "Group Groups": ["parent_group_id", "child_group_id"]
+}
+
+# Fields that can be derived from other fields, so are never truly mandatory
+DERIVABLE_FIELDS = {
+    'Users': {
+        'user_id',     # Can be derived from email
+        'username',    # Can be derived from email
+        'first_name',  # Can be derived from full_name
+        'last_name'    # Can be derived from full_name
+    },
+    'Groups': {'group_id'},  # Can be derived from group_name
+    'Roles': {'role_id'},    # Can be derived from role_name
+    'Resources': {'resource_id'}  # Can be derived from resource_name
+}
+
+def normalize_header(s: str) -> str:
+    """Normalize a header, field or synonym for comparison."""
+    return s.lower().replace(' ', '_').replace('-', '_')
+
 class HeaderMapper:
     def __init__(self, schema_file: str, auto_mapping_enabled: bool = True):
         self.schema_file = schema_file
@@ -42,22 +90,57 @@ class HeaderMapper:
             self.logger.error(f"Error loading schema: {e}")
             raise
         
+        # Field names per tab, resolved from the schema once
+        self._valid_fields = {tab: frozenset(tab_schema) for tab, tab_schema in self.schema.items()}
+        
+        # Truly mandatory fields per tab, resolved from the schema once
+        self._mandatory_fields = {
+            tab: frozenset(field for field, details in tab_schema.items()
+                           if details.get('mandatory', False)) - DERIVABLE_FIELDS.get(tab, set())
+            for tab, tab_schema in self.schema.items()
+        }
+        
+        # Normalized fields and synonyms per tab, built once instead of per header
+        self._tab_choices = {tab: self._build_tab_choices(tab_schema)
+                             for tab, tab_schema in self.schema.items()}
+        
         # Load the YAML mappings
         current_dir = Path(schema_file).parent
         yaml_path = current_dir / 'header_mappings.yaml'
         try:
             with open(yaml_path) as f:
-                self.yaml_mappings = yaml.safe_load(f)
+                self.yaml_mappings = yaml.load(f, Loader=YAML_LOADER)
         except Exception as e:
             self.logger.error(f"Error loading YAML mappings: {e}")
             raise
 
         self.saved_mappings = {}
         self.mappings_file = Path(schema_file).parent / 'mappings_history.json'
+        # Append-only log of changes made since the snapshot was last written
+        self.journal_file = self.mappings_file.with_suffix('.jsonl')
         self.load_saved_mappings()
 
+    def _build_tab_choices(self, tab_schema: Dict) -> Dict:
+        """Lay out a tab's normalized field names and synonyms for matching.
+        
+        Choices are stored field by field; field_starts holds the index of each
+        field's first choice so per-field scores can be reduced over slices.
+        """
+        fields = list(tab_schema.keys())
+        choices = []
+        field_starts = []
+        exact = {}  # A choice shared by several fields belongs to the first one
+        for field, props in tab_schema.items():
+            field_starts.append(len(choices))
+            field_choices = [normalize_header(field)]
+            field_choices.extend(normalize_header(syn) for syn in props.get('synonyms', []))
+            choices.extend(field_choices)
+            for choice in field_choices:
+                exact.setdefault(choice, field)
+        return {'fields': fields, 'choices': choices, 'field_starts': field_starts, 'exact': exact}
+
     def load_saved_mappings(self):
-        """Load previously saved mappings."""
+        """Load previously saved mappings: the snapshot plus any journaled changes."""
         self.saved_mappings = {}
         if self.mappings_file.exists():
             try:
@@ -66,20 +149,66 @@ class HeaderMapper:
             except json.JSONDecodeError as e:
                 self.logger.error(f"Error loading mappings file: {e}")
                 self.saved_mappings = {}
+        
+        self._journal_lines = 0
+        if self.journal_file.exists():
+            with open(self.journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        self.saved_mappings.update(json.loads(line))
+                        self._journal_lines += 1
+                    except json.JSONDecodeError as e:
+                        # A torn last line from an interrupted write; the rest still applies
+                        self.logger.error(f"Error loading mappings journal entry: {e}")
+        
+        # What is already on disk, so saves only need to write the difference
+        self._persisted_mappings = dict(self.saved_mappings)
+        self._index_saved_mappings()
+
+    def _index_saved_mappings(self) -> None:
+        """Index saved mappings by tab and normalized header; the first entry wins."""
+        self._saved_normalized = {}
+        for key, target in self.saved_mappings.items():
+            tab, sep, header = key.partition(':')
+            if sep and isinstance(target, str):
+                self._saved_normalized.setdefault((tab, normalize_header(header)), target)
 
     def save_mappings(self, mappings: Dict[str, str]) -> None:
         """Save mappings including explicitly skipped headers."""
         try:
             # Update saved_mappings with new mappings
             self.saved_mappings.update(mappings)
+            self._index_saved_mappings()
             
-            # Write to file
-            with open(self.mappings_file, 'w') as f:
-                json.dump(self.saved_mappings, f, indent=2)
-            self.logger.info(f"Mappings saved successfully to {self.mappings_file}")
+            # Removed entries and long journals need the full snapshot rewritten
+            removed = self._persisted_mappings.keys() - self.saved_mappings.keys()
+            if removed or self._journal_lines >= MAPPINGS_JOURNAL_MAX_LINES:
+                self.compact_mappings()
+                return
+            
+            # Otherwise append only the entries that changed
+            changed = {key: value for key, value in self.saved_mappings.items()
+                       if key not in self._persisted_mappings or self._persisted_mappings[key] != value}
+            if changed:
+                with open(self.journal_file, 'a') as f:
+                    f.writelines(json.dumps({key: value}) + '\n' for key, value in changed.items())
+                self._journal_lines += len(changed)
+                self._persisted_mappings.update(changed)
+            self.logger.info(f"Mappings saved successfully to {self.journal_file}")
         except Exception as e:
             self.logger.error(f"Error saving mappings: {e}")
 
+    def compact_mappings(self) -> None:
+        """Rewrite the mappings snapshot and clear the journal."""
+        # The snapshot is machine-read only, so skip the indentation
+        with open(self.mappings_file, 'w') as f:
+            json.dump(self.saved_mappings, f, separators=(',', ':'))
+        if self.journal_file.exists():
+            self.journal_file.unlink()
+        self._journal_lines = 0
+        self._persisted_mappings = dict(self.saved_mappings)
+        self.logger.info(f"Mappings saved successfully to {self.mappings_file}")
+
     def map_headers(self, headers: List[str], tab_name: str) -> Dict[str, str]:
         """Map input headers to schema fields."""
         if not self.auto_mapping_enabled:
@@ -102,104 +231,76 @@ class HeaderMapper:
         
         mappings = {}
         
-        # Get schema for this tab
-        tab_schema = self.schema.get(tab_name, {})
-        if not tab_schema:
-            self.logger.warning(f"No schema found for tab {tab_name}")
-            return mappings
-            
-        self.logger.debug(f"Processing {len(headers)} headers for {tab_name}")
-        
-        # Helper function to normalize strings for comparison
-        def normalize(s: str) -> str:
-            return s.lower().replace(' ', '_').replace('-', '_')
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Processing {len(headers)} headers for {tab_name}")
         
         # First try exact matches and saved mappings
+        exact_matches = self._tab_choices[tab_name]['exact']
         for header in headers:
             # Check saved mappings first
             mapping_key = f"{tab_name}:{header}"
             if mapping_key in self.saved_mappings:
                 mappings[header] = self.saved_mappings[mapping_key]
                 continue
-                
-            normalized_header = normalize(header)
-            matched = False
             
-            # Try exact match with schema fields
-            for field, props in tab_schema.items():
-                if normalize(field) == normalized_header:
-                    mappings[header] = field
-                    matched = True
-                    break
-                    
-                # Try synonyms
-                if not matched:
-                    synonyms = props.get('synonyms', [])
-                    if any(normalize(syn) == normalized_header for syn in synonyms):
-                        mappings[header] = field
-                        matched = True
-                        break
+            # Then a saved mapping for the same header spelled differently
+            normalized = normalize_header(header)
+            saved = self._saved_normalized.get((tab_name, normalized))
+            if saved is not None:
+                mappings[header] = saved
+                continue
+            
+            # Exact match with a schema field or synonym is a single lookup
+            field = exact_matches.get(normalized)
+            if field is not None:
+                mappings[header] = field
         
         # Try fuzzy matching for remaining unmapped headers
         unmapped_headers = [h for h in headers if h not in mappings]
-        for header in unmapped_headers:
-            best_match = None
-            best_score = 60  # Minimum match score threshold
-            normalized_header = normalize(header)
-            
-            for field, props in tab_schema.items():
-                # Skip if field is already mapped
-                if field in mappings.values():
-                    continue
-                    
-                # Calculate match scores including normalized comparison
-                field_score = self.calculate_match_score(normalized_header, normalize(field))
-                synonym_scores = [
-                    self.calculate_match_score(normalized_header, normalize(syn))
-                    for syn in props.get('synonyms', [])
-                ]
-                
-                max_score = max([field_score] + synonym_scores)
-                if max_score > best_score:
-                    best_score = max_score
-                    best_match = field
+        if unmapped_headers:
+            # Score every unmapped header against every field and synonym in one
+            # call; each field's best score is a max over its own slice of choices.
+            # Pairs that cannot clear the threshold are cut off early and score 0
+            tab_choices = self._tab_choices[tab_name]
+            fields = tab_choices['fields']
+            scores = process.cdist([normalize_header(h) for h in unmapped_headers],
+                                   tab_choices['choices'], scorer=fuzz.token_sort_ratio,
+                                   processor=utils.default_process, score_cutoff=61)
+            field_scores = np.floor(np.maximum.reduceat(scores, tab_choices['field_starts'], axis=1))
             
-            if best_match:
-                mappings[header] = best_match
+            used_fields = np.isin(fields, list(mappings.values()))
+            for row, header in zip(field_scores, unmapped_headers):
+                # Skip fields that are already mapped
+                row = np.where(used_fields, -1, row)
+                best = int(np.argmax(row))
+                if row[best] > 60:  # Minimum match score threshold
+                    mappings[header] = fields[best]
+                    used_fields[best] = True
         
         self.logger.info(f"Generated mappings for {tab_name}: {mappings}")
         return mappings
 
     def _get_prominent_fields(self, tab_name: str) -> List[str]:
         """Get list of prominent fields for a tab."""
-        prominent = {
-            "Users": ["user_id", "username", "email", "first_name", "last_name"],
-            "Groups": ["group_id", "group_name"],
-            "Roles": ["role_id", "role_name"],
-            "Resources": ["resource_id", "resource_name"],
-            "User Groups": ["user_id", "group_id"],
-            "User Roles": ["user_id", "role_id"],
-            "Group Roles": ["group_id", "role_id"],
-            "User Resources": ["user_id", "resource_id"],
-            "Role Resources": ["role_id", "resource_id"],
-            "Group Resources": ["group_id", "resource_id"],
-            "Group Groups": ["parent_group_id", "child_group_id"]
-        }
-        return prominent.get(tab_name, [])
+        return list(PROMINENT_FIELDS.get(tab_name, []))
 
     def get_fuzzy_matches(self, header: str, tab_schema: Dict, num_matches: int = 5) -> List[Tuple[str, int]]:
         """Get fuzzy matches for a header from valid schema fields only."""
         # Only include fields that are in the schema
         valid_fields = list(tab_schema.keys())
         
-        # Get matches for the header against valid fields
-        matches = process.extract(header.lower(), valid_fields, limit=len(valid_fields))
-        
-        # Filter and sort matches
-        final_matches = [(field, score) for field, score in matches if field in valid_fields]
-        final_matches.sort(key=lambda x: x[1], reverse=True)
+        # Get the best matches for the header against valid fields; RapidFuzz
+        # keeps only the top num_matches, already sorted by score
+        matches = process.extract(header.lower(), valid_fields, scorer=fuzz.WRatio,
+                                  processor=utils.default_process, limit=num_matches)
         
-        return final_matches[:num_matches]
+        # Candidates are the valid fields themselves, so no filtering is needed
+        return [(field, int(round(score))) for field, score, _ in matches]
+
+    def _sample_values(self, preview_data: pd.DataFrame, headers: List[str]) -> Dict[str, list]:
+        """Get up to three distinct non-null sample values per header, computed once."""
+        return {header: preview_data[header].dropna().unique()[:3].tolist()
+                for header in headers if header in preview_data.columns}
 
     def print_separator(self, char: str = '-', length: int = 60):
         """Print a separator line."""
@@ -215,19 +316,22 @@ class HeaderMapper:
         """Review and confirm mappings with focus on mandatory fields first."""
         tab_schema = self.schema.get(tab_name, {})
         valid_fields = sorted(tab_schema.keys())
+        # Samples don't change between passes of the review loop
+        samples = self._sample_values(preview_data, input_headers)
 
         while True:
             clear_screen()
             # Use the new print_mappings_preview function
-            self.print_mappings_preview({k: v for k, v in mappings.items()}, {tab_name: preview_data})
+            self.print_mappings_preview({k: v for k, v in mappings.items()}, {tab_name: preview_data}, samples)
 
             choice = input().lower().strip()
             
             if choice == 'c':
                 # Validate mandatory fields are mapped before continuing
                 mandatory_fields = self.get_mandatory_fields(tab_name)
+                mapped_targets = {target for target in mappings.values() if target is not None}
                 unmapped_mandatory = [field for field in mandatory_fields 
-                                    if field not in mappings.values()]
+                                    if field not in mapped_targets]
                 
                 if unmapped_mandatory:
                     print(f"\n{Fore.RED}Warning: The following mandatory fields are unmapped:{Style.RESET_ALL}")
@@ -239,54 +343,53 @@ class HeaderMapper:
                 break
             elif choice == 's':
                 return self.start_over_mapping(input_headers, tab_name, preview_data)
-            else:
-                try:
-                    idx = int(choice)
-                    if 1 <= idx <= len(valid_fields):
-                        target_field = valid_fields[idx-1]
-                        current_source = next((k for k, v in mappings.items() if v == target_field), "(unmapped)")
-                        
-                        print(f"\nModifying mapping for: '{target_field}'")
-                        print(f"Currently mapped to: '{current_source}'")
-                        
-                        # Show available source attributes with sample values
-                        print("\nAvailable source attributes:")
+            elif choice.isdecimal():
+                idx = int(choice)
+                if 1 <= idx <= len(valid_fields):
+                    target_field = valid_fields[idx-1]
+                    current_source = next((k for k, v in mappings.items() if v == target_field), "(unmapped)")
+                    
+                    print(f"\nModifying mapping for: '{target_field}'")
+                    print(f"Currently mapped to: '{current_source}'")
+                    
+                    # Show available source attributes with sample values
+                    with buffered_output() as out:
+                        print("\nAvailable source attributes:", file=out)
                         for src_idx, header in enumerate(input_headers, 1):
                             mapped_to = mappings.get(header, "")
                             status = f" (currently mapped to '{mapped_to}')" if mapped_to else ""
-                            if header in preview_data.columns:
-                                sample_values = preview_data[header].dropna().unique()[:3].tolist()
-                                print(f"{src_idx}) '{header}'{status}")
-                                print(f"   Sample values: {sample_values}")
+                            if header in samples:
+                                print(f"{src_idx}) '{header}'{status}", file=out)
+                                print(f"   Sample values: {samples[header]}", file=out)
                             else:
-                                print(f"{src_idx}) '{header}'{status}")
-                        
-                        print("0) Remove mapping")
-                        
-                        src_choice = input("\nChoose source attribute (0-N): ")
-                        try:
-                            src_idx = int(src_choice)
-                            if src_idx == 0:
-                                # Remove any existing mapping to this target
-                                for k, v in list(mappings.items()):
-                                    if v == target_field:
-                                        del mappings[k]
-                            elif 1 <= src_idx <= len(input_headers):
-                                source_header = input_headers[src_idx-1]
-                                # Remove any existing mapping to this target
-                                for k, v in list(mappings.items()):
-                                    if v == target_field:
-                                        del mappings[k]
-                                # Remove any existing mapping from this source
-                                if source_header in mappings:
-                                    del mappings[source_header]
-                                mappings[source_header] = target_field
-                                print(f"\n✓ Updated mapping: '{target_field}' ← '{source_header}'")
-                        except ValueError:
-                            print("Invalid choice, keeping current mapping")
-                            
-                except ValueError:
-                    print("Invalid choice, please try again")
+                                print(f"{src_idx}) '{header}'{status}", file=out)
+                    
+                        print("0) Remove mapping", file=out)
+                    
+                    src_choice = input("\nChoose source attribute (0-N): ").strip()
+                    # Digits are checked up front instead of catching ValueError from int()
+                    if src_choice.isdecimal():
+                        src_idx = int(src_choice)
+                        if src_idx == 0:
+                            # Remove any existing mapping to this target
+                            for k, v in list(mappings.items()):
+                                if v == target_field:
+                                    del mappings[k]
+                        elif 1 <= src_idx <= len(input_headers):
+                            source_header = input_headers[src_idx-1]
+                            # Remove any existing mapping to this target
+                            for k, v in list(mappings.items()):
+                                if v == target_field:
+                                    del mappings[k]
+                            # Remove any existing mapping from this source
+                            if source_header in mappings:
+                                del mappings[source_header]
+                            mappings[source_header] = target_field
+                            print(f"\n✓ Updated mapping: '{target_field}' ← '{source_header}'")
+                    else:
+                        print("Invalid choice, keeping current mapping")
+            else:
+                print("Invalid choice, please try again")
 
         # Save confirmed mappings
         for header, target in mappings.items():
@@ -297,10 +400,6 @@ class HeaderMapper:
         self.save_mappings(self.saved_mappings)
         return mappings
 
-    def calculate_match_score(self, source: str, target: str) -> int:
-        """Calculate match score between source and target strings."""
-        return int(SequenceMatcher(None, source.lower(), target.lower()).ratio() * 100)
-
     def _confirm_mappings(self, mappings: Dict[str, str], tab_name: str, 
                          preview_data: pd.DataFrame) -> Dict[str, str]:
         """Show mapping preview with sample data and confirm."""
@@ -337,32 +436,7 @@ class HeaderMapper:
 
     def get_mandatory_fields(self, tab_name: str) -> Set[str]:
         """Get truly mandatory fields that cannot be derived."""
-        tab_schema = self.schema.get(tab_name, {})
-        
-        # Define fields that can be derived from other fields
-        derivable_fields = {
-            'Users': {
-                'user_id',     # Can be derived from email
-                'username',    # Can be derived from email
-                'first_name',  # Can be derived from full_name
-                'last_name'    # Can be derived from full_name
-            },
-            'Groups': {'group_id'},  # Can be derived from group_name
-            'Roles': {'role_id'},    # Can be derived from role_name
-            'Resources': {'resource_id'}  # Can be derived from resource_name
-        }
-        
-        # Get all mandatory fields from schema
-        mandatory_fields = {
-            field for field, details in tab_schema.items()
-            if details.get('mandatory', False)
-        }
-        
-        # Remove fields that can be derived for this tab
-        if tab_name in derivable_fields:
-            mandatory_fields -= derivable_fields[tab_name]
-        
-        return mandatory_fields
+        return set(self._mandatory_fields.get(tab_name, ()))
 
     def start_over_mapping(self, input_headers: List[str], tab_name: str, preview_data: pd.DataFrame) -> Dict[str, str]:
         """Start the mapping process over from scratch."""
@@ -379,9 +453,8 @@ class HeaderMapper:
         # Initialize empty mappings
         mappings = {}
         
-        # Get schema for this tab
-        tab_schema = self.schema.get(tab_name, {})
-        valid_fields = set(tab_schema.keys())
+        # Get the fields defined for this tab
+        valid_fields = self._valid_fields.get(tab_name, frozenset())
         
         # Get unmapped mandatory fields that cannot be derived
         mandatory_fields = self.get_mandatory_fields(tab_name)
@@ -397,6 +470,15 @@ class HeaderMapper:
                                 mandatory_fields: Set[str]) -> Dict[str, str]:
         """Interactive mapping flow for fields."""
         mappings = {}
+        tab_schema = self.schema.get(tab_name, {})
+        samples = self._sample_values(preview_data, input_headers)
+        
+        # Score every field against every input header in one call up front
+        # instead of one extract call per field
+        fields = list(valid_fields)
+        field_rows = {field: row for row, field in enumerate(fields)}
+        scores = process.cdist(fields, input_headers, scorer=fuzz.WRatio, processor=utils.default_process,
+                               score_cutoff=50)
         
         print(f"\n{Fore.CYAN}Starting mapping process for {tab_name}{Style.RESET_ALL}")
         
@@ -404,7 +486,8 @@ class HeaderMapper:
         if mandatory_fields:
             print(f"\n{Fore.CYAN}Mapping mandatory fields:{Style.RESET_ALL}")
             for field in mandatory_fields:
-                mapped = self._map_single_field(field, input_headers, preview_data, mappings, tab_schema)
+                mapped = self._map_single_field(field, input_headers, preview_data, mappings, tab_schema, samples,
+                                                scores[field_rows[field]])
                 if not mapped:
                     print(f"{Fore.YELLOW}Note: '{field}' not mapped - will need to be derived{Style.RESET_ALL}")
         
@@ -412,27 +495,37 @@ class HeaderMapper:
         print(f"\n{Fore.CYAN}Mapping optional fields:{Style.RESET_ALL}")
         optional_fields = valid_fields - mandatory_fields
         for field in optional_fields:
-            self._map_single_field(field, input_headers, preview_data, mappings, tab_schema)
+            self._map_single_field(field, input_headers, preview_data, mappings, tab_schema, samples,
+                                   scores[field_rows[field]])
         
         return mappings
 
     def _map_single_field(self, target_field: str, input_headers: List[str], 
                          preview_data: pd.DataFrame, mappings: Dict[str, str],
-                         tab_schema: Dict) -> bool:
+                         tab_schema: Dict, samples: Optional[Dict[str, list]] = None,
+                         header_scores: Optional[np.ndarray] = None) -> bool:
         """Handle mapping for a single field. Returns True if mapping was successful."""
         print(f"\nMapping field: {target_field}")
         
-        # Get potential matches using fuzzy matching
-        matches = process.extract(target_field, input_headers, limit=len(input_headers))
-        potential_matches = [(header, score) for header, score in matches if score > 50]
+        # Get potential matches using fuzzy matching, best first
+        if header_scores is None:
+            header_scores = process.cdist([target_field], input_headers, scorer=fuzz.WRatio,
+                                          processor=utils.default_process, score_cutoff=50)[0]
+        order = np.argsort(-header_scores, kind='stable')
+        potential_matches = [(input_headers[i], int(round(header_scores[i]))) for i in order
+                             if header_scores[i] > 50]
         
         if potential_matches:
-            print("\nPotential matches:")
-            for idx, (header, score) in enumerate(potential_matches, 1):
-                print(f"{idx}) {header} (match score: {score}%)")
-                if header in preview_data.columns:
-                    sample_values = preview_data[header].dropna().unique()[:3].tolist()
-                    print(f"   Sample values: {sample_values}")
+            with buffered_output() as out:
+                print("\nPotential matches:", file=out)
+                for idx, (header, score) in enumerate(potential_matches, 1):
+                    print(f"{idx}) {header} (match score: {score}%)", file=out)
+                    if samples is not None:
+                        if header in samples:
+                            print(f"   Sample values: {samples[header]}", file=out)
+                    elif header in preview_data.columns:
+                        sample_values = preview_data[header].dropna().unique()[:3].tolist()
+                        print(f"   Sample values: {sample_values}", file=out)
         else:
             print("No potential matches found")
         
@@ -445,37 +538,40 @@ class HeaderMapper:
         if choice == 's':
             return False
         
-        try:
+        if choice.isdecimal():
             idx = int(choice)
             if 1 <= idx <= len(potential_matches):
                 header = potential_matches[idx-1][0]
                 mappings[header] = target_field
                 return True
-        except ValueError:
-            pass
         
         return False
 
-    def print_mappings_preview(self, mappings: Dict[str, str], data: Dict[str, pd.DataFrame]) -> None:
+    def print_mappings_preview(self, mappings: Dict[str, str], data: Dict[str, pd.DataFrame],
+                               samples: Optional[Dict[str, list]] = None) -> None:
         """Display current mappings with sample data."""
-        print(f"\n{Fore.CYAN}Current Mappings{Style.RESET_ALL}")
-        print("=" * 80)
-
-        for source_header, target_field in mappings.items():
-            # Find which sheet contains this header
-            for sheet_name, df in data.items():
-                if source_header in df.columns:
-                    samples = df[source_header].dropna().unique()[:3].tolist()
-                    samples_str = ", ".join(str(s) for s in samples)
-                    print(f"{Fore.WHITE}'{target_field}' ← {Fore.GREEN}'{source_header}'{Style.RESET_ALL}")
-                    print(f"   Samples: [{samples_str}]")
-                    break
+        with buffered_output() as out:
+            print(f"\n{Fore.CYAN}Current Mappings{Style.RESET_ALL}", file=out)
+            print("=" * 80, file=out)
 
-        print("\nOptions:")
-        print("1-N) Select target field to modify")
-        print("c) Continue with current mappings")
-        print("s) Start over (clear all mappings)")
-        print("\nChoose option (number, c, or s):")
+            for source_header, target_field in mappings.items():
+                if samples is not None and source_header in samples:
+                    header_samples = samples[source_header]
+                else:
+                    # Find which sheet contains this header
+                    header_samples = next((df[source_header].dropna().unique()[:3].tolist()
+                                           for df in data.values() if source_header in df.columns), None)
+                    if header_samples is None:
+                        continue
+                samples_str = ", ".join(str(s) for s in header_samples)
+                print(f"{Fore.WHITE}'{target_field}' ← {Fore.GREEN}'{source_header}'{Style.RESET_ALL}", file=out)
+                print(f"   Samples: [{samples_str}]", file=out)
+
+            print("\nOptions:", file=out)
+            print("1-N) Select target field to modify", file=out)
+            print("c) Continue with current mappings", file=out)
+            print("s) Start over (clear all mappings)", file=out)
+            print("\nChoose option (number, c, or s):", file=out)
 
     def detect_possible_tabs(self, headers: List[str]) -> List[str]:
         """Detect which tabs are likely present based on column headers."""
@@ -214,7 +214,8 @@ class AMT8000CLI:
                             break
                         elif choice == 'v':
                             mandatory_fields = mapper.get_mandatory_fields(tab_name)
-                            unmapped = [f for f in mandatory_fields if f not in mappings.values()]
+                            mapped_targets = set(mappings.values())
+                            unmapped = [f for f in mandatory_fields if f not in mapped_targets]
                             if unmapped:
                                 self.print_styled("\n! WARNING: MANDATORY FIELDS UNMAPPED", Fore.RED)
                                 for field in unmapped:
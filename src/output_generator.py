@@ -100,20 +100,24 @@ class OutputGenerator:
             
             if not valid_rows.empty:
                 logger.info(f"Found {len(valid_rows)} rows with both user_id and group_name")
-                relationships = []
+                user_ids = []
+                group_ids = []
+                user_ids_append = user_ids.append
+                group_ids_append = group_ids.append
                 
                 for _, row in valid_rows.iterrows():
                     user_id = str(row['user_id']).strip()
                     group_name = str(row['group_name']).strip()
                     
                     if group_name in transformer.group_id_map:
-                        relationships.append({
-                            'user_id': user_id,
-                            'group_id': transformer.group_id_map[group_name]
-                        })
+                        user_ids_append(user_id)
+                        group_ids_append(transformer.group_id_map[group_name])
             
-                if relationships:
-                    user_groups_df = pd.DataFrame(relationships).drop_duplicates()
+                if user_ids:
+                    user_groups_df = pd.DataFrame({
+                        'user_id': user_ids,
+                        'group_id': group_ids
+                    }).drop_duplicates()
                     organized_data['User Groups'] = user_groups_df
                     logger.info(f"Created {len(user_groups_df)} direct user-group relationships")
                 else:
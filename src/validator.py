@@ -1,8 +1,10 @@
 import sys
 import pandas as pd
+import numpy as np
 from typing import Dict, Tuple, List
 import logging
 from colorama import Fore, Style, init
+from data_validator import split_records
 
 init(autoreset=True)
 
@@ -37,7 +39,7 @@ class Validator:
                 continue
 
             try:
-                valid_mask = pd.Series(True, index=df.index)
+                valid_mask = np.ones(len(df), dtype=bool)
 
                 if tab_name == "Users" or tab_name == "Flattened":
                     validation_results = self._validate_users(df)
@@ -54,10 +56,9 @@ class Validator:
                     print(f"\n  ▶ {check.upper()} CHECK:")
                     for reason in reasons:
                         print(f"    • {reason}")
-                    valid_mask &= check_mask
+                    valid_mask &= np.asarray(check_mask, dtype=bool)
 
-                valid_records = df[valid_mask]
-                invalid_records = df[~valid_mask]
+                valid_records, invalid_records = split_records(df, valid_mask)
 
                 print(f"\n► VALIDATION SUMMARY FOR {tab_name}")
                 print("  ═══════════════════════════")
@@ -77,7 +78,7 @@ class Validator:
 
         return valid_data, invalid_data
 
-    def _validate_users(self, df: pd.DataFrame) -> Dict[str, Tuple[pd.Series, List[str]]]:
+    def _validate_users(self, df: pd.DataFrame) -> Dict[str, Tuple[np.ndarray, List[str]]]:
         """Validate Users tab data."""
         validation_results = {}
         
@@ -88,33 +89,33 @@ class Validator:
 
         # Identifier Check
         identifier_reasons = []
-        user_id_mask = df['user_id'].notna()
-        email_mask = df['email'].notna()
-        identifier_mask = user_id_mask | email_mask
+        identifier_mask = df[['user_id', 'email']].notna().to_numpy().any(axis=1)
         
-        if (~identifier_mask).any():
-            identifier_reasons.append(f"Missing identifiers in {(~identifier_mask).sum()} records")
+        if not identifier_mask.all():
+            identifier_reasons.append(f"Missing identifiers in {len(identifier_mask) - np.count_nonzero(identifier_mask)} records")
         validation_results['identifier'] = (identifier_mask, identifier_reasons)
 
         # Name Check
         name_reasons = []
-        name_mask = df['first_name'].notna() & df['last_name'].notna()
-        if (~name_mask).any():
-            name_reasons.append(f"Missing name components in {(~name_mask).sum()} records")
+        name_mask = df[['first_name', 'last_name']].notna().to_numpy().all(axis=1)
+        if not name_mask.all():
+            name_reasons.append(f"Missing name components in {len(name_mask) - np.count_nonzero(name_mask)} records")
         validation_results['name'] = (name_mask, name_reasons)
 
         # Status Check
         status_reasons = []
-        valid_statuses = {'Yes', 'No'}  # Updated to accept Yes/No values
-        status_mask = df['is_active'].isin(valid_statuses)
-        if (~status_mask).any():
-            invalid_statuses = df[~status_mask]['is_active'].unique()
+        valid_statuses = ['Yes', 'No']  # Updated to accept Yes/No values
+        # Anything outside the categories (including null) gets code -1
+        status_mask = pd.Categorical(df['is_active'], categories=valid_statuses).codes != -1
+        if not status_mask.all():
+            # Positional pick from the column alone, no boolean .loc over the frame
+            invalid_statuses = pd.unique(df['is_active'].to_numpy()[~status_mask])
             status_reasons.append(f"Invalid status values found: {', '.join(map(str, invalid_statuses))}")
         validation_results['status'] = (status_mask, status_reasons)
 
         return validation_results
 
-    def _validate_entity_tab(self, df: pd.DataFrame, tab_name: str) -> Dict[str, Tuple[pd.Series, List[str]]]:
+    def _validate_entity_tab(self, df: pd.DataFrame, tab_name: str) -> Dict[str, Tuple[np.ndarray, List[str]]]:
         """Validate entity tabs (Roles, Groups, Resources)."""
         validation_results = {}
         
@@ -126,21 +127,21 @@ class Validator:
         elif tab_name == "Resources":
             id_fields = ['resource_id', 'resource_name']
         else:
-            return {'error': (pd.Series(False, index=df.index), [f"Unknown entity tab: {tab_name}"])}
+            return {'error': (np.zeros(len(df), dtype=bool), [f"Unknown entity tab: {tab_name}"])}
 
         # Validate identifier fields
         identifier_reasons = []
-        identifier_mask = pd.Series(False, index=df.index)
+        identifier_mask = np.zeros(len(df), dtype=bool)
         
         available_fields = [field for field in id_fields if field in df.columns]
         if not available_fields:
             identifier_reasons.append(f"No identifier fields found. Required: {' or '.join(id_fields)}")
         else:
-            for field in available_fields:
-                identifier_mask |= df[field].notna()
+            # One reduction over the 2-D null matrix instead of a per-column OR
+            identifier_mask = df[available_fields].notna().to_numpy().any(axis=1)
             
-            if (~identifier_mask).any():
-                missing_count = (~identifier_mask).sum()
+            if not identifier_mask.all():
+                missing_count = len(identifier_mask) - np.count_nonzero(identifier_mask)
                 identifier_reasons.append(f"Missing identifiers in {missing_count} records")
         
         validation_results['identifier'] = (identifier_mask, identifier_reasons)
@@ -148,16 +149,16 @@ class Validator:
         # Validate name fields if present
         name_field = f"{tab_name.lower()[:-1]}_name"  # e.g., role_name, group_name
         if name_field in df.columns:
-            name_mask = df[name_field].notna()
+            name_mask = df[name_field].notna().to_numpy()
             name_reasons = []
-            if (~name_mask).any():
-                missing_count = (~name_mask).sum()
+            if not name_mask.all():
+                missing_count = len(name_mask) - np.count_nonzero(name_mask)
                 name_reasons.append(f"Missing {name_field} in {missing_count} records")
             validation_results['name'] = (name_mask, name_reasons)
 
         return validation_results
 
-    def _validate_relationship_tab(self, df: pd.DataFrame, tab_name: str) -> Dict[str, Tuple[pd.Series, List[str]]]:
+    def _validate_relationship_tab(self, df: pd.DataFrame, tab_name: str) -> Dict[str, Tuple[np.ndarray, List[str]]]:
         """Validate relationship tabs (User Roles, User Groups, Role Resources)."""
         validation_results = {}
         
@@ -169,36 +170,41 @@ class Validator:
         elif tab_name == "Role Resources":
             required_fields = ['role_id', 'resource_id']
         else:
-            return {'error': (pd.Series(False, index=df.index), [f"Unknown relationship tab: {tab_name}"])}
+            return {'error': (np.zeros(len(df), dtype=bool), [f"Unknown relationship tab: {tab_name}"])}
 
         # Check for required fields
         field_reasons = []
-        field_mask = pd.Series(True, index=df.index)
+        field_mask = np.ones(len(df), dtype=bool)
         
         missing_fields = [field for field in required_fields if field not in df.columns]
         if missing_fields:
             field_reasons.append(f"Missing required fields: {', '.join(missing_fields)}")
-            field_mask = pd.Series(False, index=df.index)
+            field_mask = np.zeros(len(df), dtype=bool)
         
         # Check for null values in required fields
         if not missing_fields:
             for field in required_fields:
-                null_mask = df[field].isna()
-                if null_mask.any():
+                null_mask = df[field].isna().to_numpy()
+                count = np.count_nonzero(null_mask)
+                if count:
                     field_mask &= ~null_mask
-                    count = null_mask.sum()
                     field_reasons.append(f"Found {count} records with null {field}")
         
         validation_results['fields'] = (field_mask, field_reasons)
 
         # Check for duplicate relationships
         duplicate_reasons = []
-        duplicate_mask = pd.Series(True, index=df.index)
+        duplicate_mask = np.ones(len(df), dtype=bool)
         
-        duplicates = df.duplicated(subset=required_fields, keep='first')
-        if duplicates.any():
+        # df.duplicated already factorizes each column and hashes one packed
+        # int64 key per row; it needs every key column to be present
+        if not missing_fields:
+            duplicates = df.duplicated(subset=required_fields, keep='first').to_numpy()
+        else:
+            duplicates = np.zeros(len(df), dtype=bool)
+        count = np.count_nonzero(duplicates)
+        if count:
             duplicate_mask &= ~duplicates
-            count = duplicates.sum()
             duplicate_reasons.append(f"Found {count} duplicate relationships")
         
         validation_results['duplicates'] = (duplicate_mask, duplicate_reasons)
@@ -214,19 +220,19 @@ class Validator:
         missing_cols = [col for col in required_cols if col not in df.columns]
         
         if missing_cols:
-            results['columns'] = (pd.Series(False, index=df.index), 
+            results['columns'] = (np.zeros(len(df), dtype=bool), 
                                 [f"Missing required columns: {', '.join(missing_cols)}"])
             return results
 
         # Validate user_id
-        user_id_mask = df['user_id'].notna()
-        user_id_missing = (~user_id_mask).sum()
+        user_id_mask = df['user_id'].notna().to_numpy()
+        user_id_missing = len(user_id_mask) - np.count_nonzero(user_id_mask)
         results['user_id'] = (user_id_mask, 
                              [f"Missing user_id in {user_id_missing} records"])
 
         # Validate group_id
-        group_id_mask = df['group_id'].notna()
-        group_id_missing = (~group_id_mask).sum()
+        group_id_mask = df['group_id'].notna().to_numpy()
+        group_id_missing = len(group_id_mask) - np.count_nonzero(group_id_mask)
         results['group_id'] = (group_id_mask, 
                               [f"Missing group_id in {group_id_missing} records"])
 